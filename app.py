@@ -1,10 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 import streamlit as st
 import wikipedia
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import wikipedia.wikipedia as wikipedia_api
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 
 st.set_page_config(page_title="Movie Recommendation — Wikipedia", layout="wide")
 
+# -------------------------------------------------------------
+# Pooled HTTP session for the wikipedia package
+# -------------------------------------------------------------
+@st.cache_resource
+def wiki_session():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# The wikipedia package calls requests.get() for every API hit, opening a new
+# connection (and TLS handshake) each time; route it through one pooled
+# session instead, and go straight to https to skip the http->https redirect.
+wikipedia_api.requests = wiki_session()
+wikipedia_api.API_URL = wikipedia_api.API_URL.replace("http://", "https://")
+
 # -------------------------------------------------------------
 # Cached Wikipedia summary fetch
 # -------------------------------------------------------------
@@ -34,25 +55,26 @@ def fast_recommend_from_wikipedia(query_title, top_n=5, max_candidates=20):
 
     candidate_titles = [t for t in candidate_titles if t.lower() != query_title.lower()]
 
-    candidate_texts = []
-    candidate_tuples = []
+    # Each summary is a blocking HTTP round-trip, so fetch them concurrently.
+    with ThreadPoolExecutor(max_workers=10) as ex:
+        summaries = list(ex.map(lambda t: fetch_wiki_summary(t, sentences=2), candidate_titles))
 
-    for t in candidate_titles:
-        s = fetch_wiki_summary(t, sentences=2)
-        if s:
-            candidate_texts.append(s)
-            candidate_tuples.append((t, s))
+    candidate_tuples = [(t, s) for t, s in zip(candidate_titles, summaries) if s]
+    candidate_texts = [s for _, s in candidate_tuples]
 
     if not candidate_tuples:
         return out, "No related Wikipedia pages found."
 
     texts = [source_summary] + candidate_texts
-    tfidf = TfidfVectorizer(stop_words="english", max_features=8000)
-    X = tfidf.fit_transform(texts)
+    # Hashing skips building a vocabulary for this throwaway corpus; the IDF
+    # weighting and L2 normalisation are applied on top as before.
+    hv = HashingVectorizer(stop_words="english", n_features=2**14, alternate_sign=False, norm=None)
+    X = TfidfTransformer().fit_transform(hv.transform(texts))
 
     source_vec = X[0]
     cand_vecs = X[1:]
-    cosines = cosine_similarity(source_vec, cand_vecs).flatten()
+    # TF-IDF rows are L2-normalised, so the dot product is the cosine.
+    cosines = cand_vecs.dot(source_vec.T).toarray().ravel()
     idxs = cosines.argsort()[::-1][:top_n]
 
     for i in idxs:
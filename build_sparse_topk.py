@@ -0,0 +1,7 @@
+# Builds the optional sparse_topk extension used by model.recommend:
+#   python build_sparse_topk.py build_ext --inplace
+# Without it, model.py falls back to the Numba kernel in kernels.py.
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(ext_modules=cythonize("sparse_topk.pyx"))
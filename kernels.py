@@ -0,0 +1,62 @@
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _sift_up(heap_scores, heap_rows, pos):
+    while pos > 0:
+        parent = (pos - 1) // 2
+        if heap_scores[parent] <= heap_scores[pos]:
+            break
+        heap_scores[parent], heap_scores[pos] = heap_scores[pos], heap_scores[parent]
+        heap_rows[parent], heap_rows[pos] = heap_rows[pos], heap_rows[parent]
+        pos = parent
+
+
+@njit(cache=True)
+def _sift_down(heap_scores, heap_rows, size):
+    pos = 0
+    while True:
+        child = 2 * pos + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap_scores[child + 1] < heap_scores[child]:
+            child += 1
+        if heap_scores[pos] <= heap_scores[child]:
+            break
+        heap_scores[child], heap_scores[pos] = heap_scores[pos], heap_scores[child]
+        heap_rows[child], heap_rows[pos] = heap_rows[pos], heap_rows[child]
+        pos = child
+
+
+@njit(cache=True)
+def sparse_cosine_topk(indptr, indices, data, q_indices, q_data, n_rows, k):
+    # indptr/indices/data are the CSC arrays of the TF-IDF matrix, i.e. an
+    # inverted index: only the postings of the query's own terms are walked
+    # to accumulate scores, and the rows are then pushed through a size-k
+    # min-heap instead of sorting them all. Returns (rows, scores), best first.
+    scores = np.zeros(n_rows, dtype=np.float64)
+    for b in range(q_indices.shape[0]):
+        col = q_indices[b]
+        weight = q_data[b]
+        for p in range(indptr[col], indptr[col + 1]):
+            scores[indices[p]] += data[p] * weight
+
+    heap_scores = np.empty(k, dtype=np.float64)
+    heap_rows = np.empty(k, dtype=np.int64)
+    size = 0
+
+    for row in range(n_rows):
+        score = scores[row]
+        if size < k:
+            heap_scores[size] = score
+            heap_rows[size] = row
+            _sift_up(heap_scores, heap_rows, size)
+            size += 1
+        elif score > heap_scores[0]:
+            heap_scores[0] = score
+            heap_rows[0] = row
+            _sift_down(heap_scores, heap_rows, size)
+
+    order = np.argsort(-heap_scores[:size])
+    return heap_rows[:size][order], heap_scores[:size][order]
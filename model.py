@@ -1,67 +1,167 @@
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
 import joblib
 import os
+from collections import namedtuple
+
+try:
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
+
+# Prefer the compiled Cython kernel (see build_sparse_topk.py), then the
+# Numba one, then plain scipy inside recommend().
+try:
+    from sparse_topk import cosine_topk as sparse_cosine_topk
+except ImportError:
+    try:
+        from kernels import sparse_cosine_topk
+    except (ImportError, RuntimeError):
+        # RuntimeError: numba's cache=True found no writable cache location.
+        sparse_cosine_topk = None
 
 DATA_PATH = os.path.join("data", "tmdb_5000_movies.csv")
-MODEL_PATH = "tfidf_matrix.pkl"
+MODEL_PATH = "tfidf_matrix.npz"
 VECT_PATH = "vectorizer.pkl"
 
+# tfidf_matrix (CSR) and postings (its CSC copy) hold the same ~1 MB of
+# non-zeros twice, on purpose: the CSR is only used to slice the query row,
+# which takes ~27 us there versus ~570 us as a row slice of the CSC.
+Model = namedtuple(
+    "Model", ["tfidf", "tfidf_matrix", "postings", "title_index", "titles", "overviews"]
+)
+
+# In-process copy of the vectoriser, CSR matrix and CSC postings, so reruns
+# and repeated imports don't go back to disk for them. ensure_model() only
+# reuses them (or the saved files) when their row count matches the
+# DataFrame it is given, and rebuilds otherwise; the title/overview arrays
+# and title index always come from that DataFrame.
+_CACHE = {}
+
 def load_data(path=DATA_PATH):
-    df = pd.read_csv(path)
-    df["overview"] = df["overview"].fillna("").astype(str)
+    # Only title and overview are used; both readers skip the other columns
+    # (genres, keywords, ... JSON blobs) instead of parsing them.
+    if pacsv is not None:
+        table = pacsv.read_csv(
+            path,
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(include_columns=["title", "overview"]),
+        )
+        df = table.to_pandas()
+    else:
+        df = pd.read_csv(
+            path,
+            usecols=["title", "overview"],
+            dtype={"title": "string", "overview": "string"},
+        )
+    return prepare_df(df)
+
+def prepare_df(df):
+    # Single place that cleans the text columns, so both CSV readers hand
+    # back the same frame: title then overview, plain str, no missing values.
+    # Works on a copy; the caller's DataFrame is left untouched.
+    df = df.copy()
     df["title"] = df["title"].fillna("").astype(str)
-    df["title_lower"] = df["title"].str.lower()
-    return df
+    df["overview"] = df["overview"].fillna("").astype(str)
+    others = [c for c in df.columns if c not in ("title", "overview")]
+    return df[["title", "overview"] + others]
 
 def build_and_save_model(df):
-    tfidf = TfidfVectorizer(stop_words="english", max_features=20000)
+    tfidf = TfidfVectorizer(stop_words="english", max_features=20000, dtype=np.float32)
     tfidf_matrix = tfidf.fit_transform(df["overview"])
+    # float32 halves the bytes the query matvec has to stream through, and
+    # canonical (sorted) CSR keeps scipy on its fast paths.
+    tfidf_matrix.sort_indices()
 
     joblib.dump(tfidf, VECT_PATH)
-    joblib.dump(tfidf_matrix, MODEL_PATH)
+    # Stored as raw data/indices/indptr arrays instead of a pickle; left
+    # uncompressed so loading is a straight read rather than an inflate.
+    sparse.save_npz(MODEL_PATH, tfidf_matrix, compressed=False)
 
+    cache_matrices(tfidf, tfidf_matrix)
     return tfidf, tfidf_matrix
 
 def load_model():
     if os.path.exists(VECT_PATH) and os.path.exists(MODEL_PATH):
         tfidf = joblib.load(VECT_PATH)
-        tfidf_matrix = joblib.load(MODEL_PATH)
+        tfidf_matrix = sparse.load_npz(MODEL_PATH)
         return tfidf, tfidf_matrix
     return None, None
 
+def cache_matrices(tfidf, tfidf_matrix):
+    # The CSC form is an inverted index (term -> docs), which lets a query
+    # touch only the postings of its own terms.
+    _CACHE["matrices"] = (tfidf, tfidf_matrix, tfidf_matrix.tocsc())
+
+def build_title_index(titles):
+    # Duplicate titles resolve to their first row, as the old boolean mask did.
+    title_index = {}
+    for i, t in enumerate(titles):
+        title_index.setdefault(t.lower(), i)
+    return title_index
+
 def ensure_model(df):
-    tfidf, tfidf_matrix = load_model()
-    if tfidf is None:
-        print("Building TF-IDF model...")
-        tfidf, tfidf_matrix = build_and_save_model(df)
-    return tfidf, tfidf_matrix
+    # df is expected to come from load_data(), i.e. already through
+    # prepare_df(). titles/overviews are plain object arrays so results are
+    # built by position rather than through df.loc label lookups per query.
+    titles = df["title"].to_numpy(dtype=object)
+    overviews = df["overview"].to_numpy(dtype=object)
 
-def recommend(title, df, tfidf, tfidf_matrix, top_n=5):
+    cached = _CACHE.get("matrices")
+    if cached is None or cached[1].shape[0] != len(df):
+        tfidf, tfidf_matrix = load_model()
+        if tfidf is None or tfidf_matrix.shape[0] != len(df):
+            print("Building TF-IDF model...")
+            build_and_save_model(df)
+        else:
+            cache_matrices(tfidf, tfidf_matrix)
+    tfidf, tfidf_matrix, postings = _CACHE["matrices"]
+
+    title_index = build_title_index(titles)
+    return Model(tfidf, tfidf_matrix, postings, title_index, titles, overviews)
+
+def recommend(title, model, top_n=5):
     title = title.lower().strip()
-    row = df[df["title_lower"] == title]
+    idx = model.title_index.get(title)
 
-    if row.empty:
+    if idx is None:
         raise ValueError(f"Movie '{title}' not found!")
 
-    idx = row.index[0]
-    movie_vec = tfidf.transform([df.loc[idx, "overview"]])
-    cosines = cosine_similarity(movie_vec, tfidf_matrix).flatten()
+    # The query overview is already vectorised as row idx of the matrix.
+    movie_vec = model.tfidf_matrix[idx]
+    postings = model.postings
+
+    if sparse_cosine_topk is not None:
+        # Fused dot product + top-k; the first hit is the query movie itself.
+        top_indices, top_scores = sparse_cosine_topk(
+            postings.indptr, postings.indices, postings.data,
+            movie_vec.indices, movie_vec.data, postings.shape[0], top_n + 1,
+        )
+        top_indices, top_scores = top_indices[1:], top_scores[1:]
+    else:
+        # Rows are L2-normalised by TfidfVectorizer, so the dot product is the
+        # cosine; only the postings columns of the query's terms contribute.
+        cosines = postings[:, movie_vec.indices].dot(movie_vec.data)
 
-    top_indices = np.argsort(-cosines)[1:top_n+1]
+        # Partially select the best top_n+1 scores and only sort those; the
+        # first one is the query movie itself.
+        k = min(top_n + 1, len(cosines))
+        part = np.argpartition(-cosines, k - 1)[:k]
+        top_indices = part[np.argsort(-cosines[part])][1:]
+        top_scores = cosines[top_indices]
 
     recommendations = []
-    for i in top_indices:
+    for i, score in zip(top_indices, top_scores):
         recommendations.append({
-            "title": df.loc[i, "title"],
-            "overview": df.loc[i, "overview"],
-            "score": float(cosines[i])
+            "title": model.titles[i],
+            "overview": model.overviews[i],
+            "score": float(score)
         })
     return recommendations
 
 if __name__ == "__main__":
     df = load_data()
-    tfidf, tfidf_matrix = ensure_model(df)
+    ensure_model(df)
     print("Model built!")
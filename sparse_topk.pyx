@@ -0,0 +1,85 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, initializedcheck=False
+# Compiled counterpart of kernels.sparse_cosine_topk. Build in place with
+#   python build_sparse_topk.py build_ext --inplace
+import numpy as np
+from libc.stdint cimport int32_t, int64_t
+
+# scipy picks int32 or int64 indices depending on size, and the matrix may
+# be float32 (as built by model.py) or float64; the query row may differ
+# from the postings, so each side gets its own fused types.
+ctypedef fused index_t:
+    int32_t
+    int64_t
+
+ctypedef fused value_t:
+    float
+    double
+
+ctypedef fused q_index_t:
+    int32_t
+    int64_t
+
+ctypedef fused q_value_t:
+    float
+    double
+
+
+cdef inline void _sift_up(double[::1] heap_scores, int64_t[::1] heap_rows, Py_ssize_t pos) noexcept nogil:
+    cdef Py_ssize_t parent
+    while pos > 0:
+        parent = (pos - 1) // 2
+        if heap_scores[parent] <= heap_scores[pos]:
+            break
+        heap_scores[parent], heap_scores[pos] = heap_scores[pos], heap_scores[parent]
+        heap_rows[parent], heap_rows[pos] = heap_rows[pos], heap_rows[parent]
+        pos = parent
+
+
+cdef inline void _sift_down(double[::1] heap_scores, int64_t[::1] heap_rows, Py_ssize_t size) noexcept nogil:
+    cdef Py_ssize_t pos = 0, child
+    while True:
+        child = 2 * pos + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap_scores[child + 1] < heap_scores[child]:
+            child += 1
+        if heap_scores[pos] <= heap_scores[child]:
+            break
+        heap_scores[child], heap_scores[pos] = heap_scores[pos], heap_scores[child]
+        heap_rows[child], heap_rows[pos] = heap_rows[pos], heap_rows[child]
+        pos = child
+
+
+def cosine_topk(const index_t[::1] indptr, const index_t[::1] indices, const value_t[::1] data,
+                const q_index_t[::1] q_indices, const q_value_t[::1] q_data,
+                Py_ssize_t n_rows, Py_ssize_t k):
+    # Same contract as kernels.sparse_cosine_topk: indptr/indices/data are
+    # the CSC postings of the TF-IDF matrix; returns (rows, scores), best first.
+    cdef double[::1] scores = np.zeros(n_rows, dtype=np.float64)
+    cdef double[::1] heap_scores = np.empty(k, dtype=np.float64)
+    cdef int64_t[::1] heap_rows = np.empty(k, dtype=np.int64)
+    cdef Py_ssize_t b, p, col, row, size = 0
+    cdef double weight, score
+
+    with nogil:
+        for b in range(q_indices.shape[0]):
+            col = q_indices[b]
+            weight = q_data[b]
+            for p in range(indptr[col], indptr[col + 1]):
+                scores[indices[p]] += data[p] * weight
+
+        for row in range(n_rows):
+            score = scores[row]
+            if size < k:
+                heap_scores[size] = score
+                heap_rows[size] = row
+                _sift_up(heap_scores, heap_rows, size)
+                size += 1
+            elif score > heap_scores[0]:
+                heap_scores[0] = score
+                heap_rows[0] = row
+                _sift_down(heap_scores, heap_rows, size)
+
+    top_scores = np.asarray(heap_scores[:size])
+    order = np.argsort(-top_scores)
+    return np.asarray(heap_rows[:size])[order], top_scores[order]